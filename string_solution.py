@@ -3,6 +3,23 @@ SafeString - A security-focused string class for protocol handling
 Complete implementation for all base code functions
 """
 
+# Fill byte for unused buffer slots
+_NULL_BYTE = b'\x00'
+
+
+def _is_ascii_text(text) -> bool:
+    """
+    Return True if text is a str made up only of ASCII characters.
+    
+    str.isascii() runs in C and is O(1) for strings CPython has already
+    flagged as ASCII. Used by SafeString.is_ascii, find, starts_with,
+    ends_with and replace. assign, append and append_char apply the same
+    isinstance(str) test but check the characters inline (strict encode
+    or ord()), so they accept exactly the same inputs.
+    """
+    return isinstance(text, str) and text.isascii()
+
+
 class SafeStringError(Exception):
     """Base exception for SafeString errors"""
     pass
@@ -26,8 +43,15 @@ class SafeString:
     
     This class is designed for handling protocol strings where buffer size
     and character encoding must be strictly controlled.
+    
+    Invariant: the first len(self) bytes of the buffer are always ASCII and
+    every byte after them is zero. Input is validated once on the way in, so
+    operations that only combine existing SafeStrings (substr, +, replace)
+    copy bytes without validating them again.
     """
     
+    __slots__ = ('_capacity', '_buffer', '_length', '_hash', '__weakref__')
+    
     def __init__(self, capacity: int, initial_value: str = ""):
         """
         Initialize SafeString with fixed capacity.
@@ -44,12 +68,39 @@ class SafeString:
             raise ValueError("Capacity must be positive")
             
         self._capacity = capacity
-        self._buffer = ['\0'] * capacity
+        # One zero-filled C allocation at 1 byte per slot. The zero fill is
+        # required: clear() and assign() rely on every byte past _length
+        # already being zero
+        self._buffer = bytearray(capacity)
         self._length = 0
+        self._hash = None
         
         if initial_value:
             self.assign(initial_value)
     
+    @classmethod
+    def _from_validated_bytes(cls, capacity: int, *pieces) -> 'SafeString':
+        """
+        Build a SafeString from byte pieces that are already known to be valid.
+        
+        Internal fast path for results derived from existing SafeStrings:
+        their buffers only ever hold ASCII, so the pieces are written straight
+        into the new buffer, one after another, without going through
+        __init__. The caller guarantees that every piece is ASCII and that
+        their total length is <= capacity.
+        """
+        result = cls.__new__(cls)
+        result._capacity = capacity
+        result._buffer = bytearray(capacity)
+        length = 0
+        for piece in pieces:
+            end = length + len(piece)
+            result._buffer[length:end] = piece
+            length = end
+        result._length = length
+        result._hash = None
+        return result
+    
     def __len__(self) -> int:
         """Return current length of the string."""
         return self._length
@@ -61,7 +112,7 @@ class SafeString:
     
     def __str__(self) -> str:
         """Return Python string representation."""
-        return ''.join(self._buffer[:self._length])
+        return self._buffer[:self._length].decode('ascii')
     
     def __repr__(self) -> str:
         """Return detailed representation for debugging."""
@@ -69,8 +120,10 @@ class SafeString:
     
     def clear(self) -> None:
         """Clear the string content."""
-        self._buffer = ['\0'] * self._capacity
+        # Only the live region can hold data; bytes past _length are already zero
+        self._buffer[:self._length] = _NULL_BYTE * self._length
         self._length = 0
+        self._hash = None
     
     def is_ascii(self, text: str) -> bool:
         """
@@ -80,17 +133,12 @@ class SafeString:
             text: String to validate
             
         Returns:
-            True if all characters are ASCII (0-127), False otherwise
+            True if text is a str and all its characters are ASCII (0-127),
+            False otherwise. Non-str input, including bytes and str-like
+            wrappers such as UserString, is rejected, as it is by every
+            SafeString method that takes text.
         """
-        try:
-            # Check each character's ordinal value is in ASCII range
-            for char in text:
-                if not (0 <= ord(char) <= 127):
-                    return False
-            return True
-        except TypeError:
-            # If text is not a string or iterable
-            return False
+        return _is_ascii_text(text)
     
     def assign(self, text: str) -> None:
         """
@@ -104,22 +152,29 @@ class SafeString:
             InvalidCharacterError: If text contains non-ASCII characters
         """
         # 1. Validate text length doesn't exceed capacity
-        if len(text) > self._capacity:
-            raise BufferOverflowError(f"Text length {len(text)} exceeds capacity {self._capacity}")
+        new_length = len(text)
+        if new_length > self._capacity:
+            raise BufferOverflowError(f"Text length {new_length} exceeds capacity {self._capacity}")
         
-        # 2. Validate text contains only ASCII characters
-        if not self.is_ascii(text):
+        # 2. Validate text is an ASCII str; the strict encode both checks
+        #    the characters and produces the bytes to copy
+        if not isinstance(text, str):
             raise InvalidCharacterError("Text contains non-ASCII characters")
+        try:
+            data = text.encode('ascii')
+        except UnicodeEncodeError:
+            raise InvalidCharacterError("Text contains non-ASCII characters") from None
         
-        # 3. Clear current buffer
-        self.clear()
+        # 3. Copy text to buffer in one slice assignment
+        self._buffer[:new_length] = data
         
-        # 4. Copy text to buffer
-        for i, char in enumerate(text):
-            self._buffer[i] = char
+        # 4. Zero any stale bytes left over from longer previous content
+        if new_length < self._length:
+            self._buffer[new_length:self._length] = _NULL_BYTE * (self._length - new_length)
         
-        # 5. Update length
-        self._length = len(text)
+        # 5. Update length and drop the cached hash
+        self._length = new_length
+        self._hash = None
     
     def append(self, text: str) -> None:
         """
@@ -132,21 +187,26 @@ class SafeString:
             BufferOverflowError: If combined length exceeds capacity
             InvalidCharacterError: If text contains non-ASCII characters
         """
-        # 1. Validate text contains only ASCII characters
-        if not self.is_ascii(text):
+        # 1. Validate text is an ASCII str; the strict encode both checks
+        #    the characters and produces the bytes to copy
+        if not isinstance(text, str):
             raise InvalidCharacterError("Text contains non-ASCII characters")
+        try:
+            data = text.encode('ascii')
+        except UnicodeEncodeError:
+            raise InvalidCharacterError("Text contains non-ASCII characters") from None
         
         # 2. Check if combined length would exceed capacity
-        new_length = self._length + len(text)
+        new_length = self._length + len(data)
         if new_length > self._capacity:
             raise BufferOverflowError(f"Appending would exceed capacity {self._capacity}")
         
-        # 3. If safe, append text to buffer
-        for i, char in enumerate(text):
-            self._buffer[self._length + i] = char
+        # 3. If safe, append the already-encoded text to buffer
+        self._buffer[self._length:new_length] = data
         
-        # 4. Update length
+        # 4. Update length and drop the cached hash
         self._length = new_length
+        self._hash = None
     
     def append_char(self, char: str) -> None:
         """
@@ -164,17 +224,23 @@ class SafeString:
         if len(char) != 1:
             raise ValueError(f"Expected single character, got string of length {len(char)}")
         
-        # 2. Validate char is ASCII
-        if not self.is_ascii(char):
+        # 2. Validate char is ASCII (checked inline; this is the per-byte
+        #    path parsers call in tight loops)
+        #    ord() also accepts 1-byte bytes/bytearray, so reject non-str first
+        if not isinstance(char, str):
+            raise InvalidCharacterError(f"Expected str character, got {type(char).__name__}")
+        code = ord(char)
+        if code > 127:
             raise InvalidCharacterError(f"Character '{char}' is not ASCII")
         
         # 3. Check if there's space
         if self._length >= self._capacity:
             raise BufferOverflowError(f"Cannot append character, at capacity {self._capacity}")
         
-        # 4. Append to buffer and update length
-        self._buffer[self._length] = char
+        # 4. Append to buffer, update length and drop the cached hash
+        self._buffer[self._length] = code
         self._length += 1
+        self._hash = None
     
     def find(self, substring: str) -> int:
         """
@@ -190,13 +256,11 @@ class SafeString:
             InvalidCharacterError: If substring contains non-ASCII characters
         """
         # 1. Validate substring is ASCII
-        if not self.is_ascii(substring):
+        if not _is_ascii_text(substring):
             raise InvalidCharacterError("Substring contains non-ASCII characters")
         
-        # 2. Search for substring in buffer
-        # Convert to string for easier searching
-        current_str = str(self)
-        return current_str.find(substring)
+        # 2. Search the live region of the buffer directly
+        return self._buffer.find(substring.encode('ascii'), 0, self._length)
     
     def substr(self, start: int, length: int = None) -> 'SafeString':
         """
@@ -221,19 +285,15 @@ class SafeString:
             # Default to remaining characters
             actual_length = self._length - start
         else:
-            # Ensure we don't go beyond the end
-            actual_length = min(length, self._length - start)
-        
-        # 3. Create new SafeString with appropriate capacity
-        # Use same capacity as original for consistency
-        result = SafeString(self._capacity)
-        
-        # 4. Copy substring to new SafeString
-        for i in range(actual_length):
-            result._buffer[i] = self._buffer[start + i]
-        result._length = actual_length
-        
-        return result
+            # Ensure we don't go beyond the end (or below zero, which would
+            # turn the slice copy below into a deletion)
+            actual_length = max(0, min(length, self._length - start))
+        
+        # 3. Copy substring into a new SafeString with the same capacity
+        # as the original for consistency
+        return SafeString._from_validated_bytes(
+            self._capacity, self._buffer[start:start + actual_length]
+        )
     
     def at(self, index: int) -> str:
         """
@@ -253,7 +313,7 @@ class SafeString:
             raise IndexOutOfBoundsError(f"Index {index} out of bounds (length {self._length})")
         
         # 2. Return character from buffer
-        return self._buffer[index]
+        return chr(self._buffer[index])
     
     def __getitem__(self, index: int) -> str:
         """Support indexing with bounds checking."""
@@ -267,34 +327,47 @@ class SafeString:
             other: Another SafeString or string
             
         Returns:
-            True if contents are equal, False otherwise
+            True if contents are equal, False otherwise; NotImplemented for
+            unsupported types so Python can try the reflected comparison
         """
-        # 1. Handle comparison with SafeString objects
-        if isinstance(other, SafeString):
-            # Quick length check
-            if self._length != other._length:
-                return False
-            
-            # Compare character by character
-            for i in range(self._length):
-                if self._buffer[i] != other._buffer[i]:
-                    return False
+        # 1. An object always equals itself
+        if self is other:
             return True
         
-        # 2. Handle comparison with Python strings
-        elif isinstance(other, str):
-            # Quick length check
-            if self._length != len(other):
+        # 2. Handle comparison with SafeString objects
+        if isinstance(other, SafeString):
+            # Differing cached hashes mean differing content
+            if (self._hash is not None and other._hash is not None
+                    and self._hash != other._hash):
                 return False
             
-            # Compare character by character
-            for i in range(self._length):
-                if self._buffer[i] != other[i]:
-                    return False
-            return True
+            # Quick length check, then compare the live bytes in one go
+            return (self._length == other._length
+                    and self._buffer[:self._length] == other._buffer[:other._length])
+        
+        # 3. Handle comparison with Python strings
+        if isinstance(other, str):
+            # Non-ASCII text can never match the buffer contents
+            return (self._length == len(other)
+                    and other.isascii()
+                    and self._buffer[:self._length] == other.encode('ascii'))
+        
+        # 4. Defer to the other operand for other types (Python falls back
+        #    to an identity check, so unrelated objects compare unequal)
+        return NotImplemented
+    
+    def __hash__(self) -> int:
+        """
+        Return a hash of the current content.
         
-        # 3. Return False for other types
-        return False
+        Matches hash(str(self)), so a SafeString and an equal Python string
+        hash alike. The value is cached until the content is next modified;
+        do not mutate a SafeString while it is used as a dict key or set member.
+        """
+        h = self._hash
+        if h is None:
+            h = self._hash = hash(str(self))
+        return h
     
     def __add__(self, other: 'SafeString') -> 'SafeString':
         """
@@ -304,15 +377,21 @@ class SafeString:
             other: Another SafeString to concatenate
             
         Returns:
-            New SafeString containing concatenated result
+            New SafeString containing concatenated result, or NotImplemented
+            if other is not a SafeString
             
         Raises:
             BufferOverflowError: If combined length exceeds capacity of result
         """
-        # 1. Calculate combined length
+        # 1. Let Python try the other operand (and raise TypeError) for
+        #    unsupported types rather than failing on attribute access
+        if not isinstance(other, SafeString):
+            return NotImplemented
+        
+        # 2. Calculate combined length
         combined_length = self._length + other._length
         
-        # 2. Create new SafeString with capacity = max(self.capacity, other.capacity)
+        # 3. Create new SafeString with capacity = max(self.capacity, other.capacity)
         result_capacity = max(self._capacity, other._capacity)
         
         # Check if combined length fits
@@ -321,21 +400,10 @@ class SafeString:
                 f"Concatenated length {combined_length} exceeds capacity {result_capacity}"
             )
         
-        result = SafeString(result_capacity)
-        
-        # 3. Copy self then other
-        # Copy self
-        for i in range(self._length):
-            result._buffer[i] = self._buffer[i]
-        
-        # Copy other
-        for i in range(other._length):
-            result._buffer[self._length + i] = other._buffer[i]
-        
-        result._length = combined_length
-        
-        # 4. Return new SafeString
-        return result
+        # 4. Copy self then other into the new SafeString
+        return SafeString._from_validated_bytes(
+            result_capacity, self._buffer[:self._length], other._buffer[:other._length]
+        )
     
     def starts_with(self, prefix: str) -> bool:
         """
@@ -351,20 +419,11 @@ class SafeString:
             InvalidCharacterError: If prefix contains non-ASCII characters
         """
         # 1. Validate prefix is ASCII
-        if not self.is_ascii(prefix):
+        if not _is_ascii_text(prefix):
             raise InvalidCharacterError("Prefix contains non-ASCII characters")
         
-        # 2. Check if prefix length <= self._length
-        prefix_len = len(prefix)
-        if prefix_len > self._length:
-            return False
-        
-        # 3. Compare characters
-        for i in range(prefix_len):
-            if self._buffer[i] != prefix[i]:
-                return False
-        
-        return True
+        # 2. Compare against the live region (a longer prefix never matches)
+        return self._buffer.startswith(prefix.encode('ascii'), 0, self._length)
     
     def ends_with(self, suffix: str) -> bool:
         """
@@ -380,21 +439,12 @@ class SafeString:
             InvalidCharacterError: If suffix contains non-ASCII characters
         """
         # 1. Validate suffix is ASCII
-        if not self.is_ascii(suffix):
+        if not _is_ascii_text(suffix):
             raise InvalidCharacterError("Suffix contains non-ASCII characters")
         
-        # 2. Check if suffix length <= self._length
-        suffix_len = len(suffix)
-        if suffix_len > self._length:
-            return False
-        
-        # 3. Compare characters from the end
-        start_index = self._length - suffix_len
-        for i in range(suffix_len):
-            if self._buffer[start_index + i] != suffix[i]:
-                return False
-        
-        return True
+        # 2. Compare against the end of the live region (a longer suffix
+        #    never matches)
+        return self._buffer.endswith(suffix.encode('ascii'), 0, self._length)
     
     def replace(self, old: str, new: str) -> 'SafeString':
         """
@@ -412,28 +462,27 @@ class SafeString:
             BufferOverflowError: If replacement would exceed capacity
         """
         # 1. Validate both strings are ASCII
-        if not self.is_ascii(old):
+        if not _is_ascii_text(old):
             raise InvalidCharacterError("Old substring contains non-ASCII characters")
-        if not self.is_ascii(new):
+        if not _is_ascii_text(new):
             raise InvalidCharacterError("New substring contains non-ASCII characters")
         
-        # 2. Create new SafeString with same capacity
-        result = SafeString(self._capacity)
-        
-        # 3. Perform replacement
-        # Convert to string for easier replacement
-        current_str = str(self)
-        replaced_str = current_str.replace(old, new)
-        
-        # 4. Check length doesn't exceed capacity
-        if len(replaced_str) > self._capacity:
-            raise BufferOverflowError(
-                f"Replacement would result in length {len(replaced_str)} exceeding capacity {self._capacity}"
-            )
-        
-        # Assign the replaced string
-        if replaced_str:
-            result.assign(replaced_str)
-        
-        # 5. Return new SafeString
-        return result
+        old_bytes = old.encode('ascii')
+        new_bytes = new.encode('ascii')
+        
+        # 2. Check length doesn't exceed capacity before building anything;
+        #    only a longer replacement can grow the string
+        growth = len(new_bytes) - len(old_bytes)
+        if growth > 0:
+            new_length = self._length + growth * self._buffer.count(old_bytes, 0, self._length)
+            if new_length > self._capacity:
+                raise BufferOverflowError(
+                    f"Replacement would result in length {new_length} exceeding capacity {self._capacity}"
+                )
+        
+        # 3. Perform replacement on the live bytes; the buffer only ever
+        #    holds ASCII, so the result needs no re-validation
+        replaced = self._buffer[:self._length].replace(old_bytes, new_bytes)
+        
+        # 4. Return new SafeString with same capacity
+        return SafeString._from_validated_bytes(self._capacity, replaced)
@@ -3,6 +3,9 @@
 Test suite for SafeString implementation
 """
 
+import weakref
+from collections import UserString
+
 import pytest
 from safe_string import SafeString, BufferOverflowError, InvalidCharacterError, IndexOutOfBoundsError
 
@@ -18,6 +21,9 @@ def test_basic_creation():
     assert len(s2) == 4
     assert str(s2) == "test"
     assert s2.capacity == 5
+    
+    # Instances stay weak-referenceable despite __slots__
+    assert weakref.ref(s2)() is s2
 
 
 def test_assign():
@@ -39,10 +45,25 @@ def test_assign():
     
     # Content should remain unchanged after failed assignment
     assert str(s) == "hello"
+    
+    # Non-str input is rejected even if it has an encode() method
+    with pytest.raises(InvalidCharacterError):
+        s.assign(UserString("hi"))
+    with pytest.raises(InvalidCharacterError):
+        s.assign(b"hi")
+    assert str(s) == "hello"
 
 
 def test_append():
     """Test append operations."""
+    # Append_char only accepts str characters, not 1-byte bytes-likes
+    s = SafeString(10, "test")
+    with pytest.raises(InvalidCharacterError):
+        s.append_char(b'a')
+    with pytest.raises(InvalidCharacterError):
+        s.append_char(bytearray(b'b'))
+    assert str(s) == "test"
+    
     s = SafeString(10, "hello")
     
     # Valid append
@@ -108,6 +129,11 @@ def test_find_and_substr():
     # Substr with length exceeding end
     sub3 = s.substr(6, 100)
     assert str(sub3) == "world"
+    
+    # Negative length yields an empty substring
+    sub4 = s.substr(1, -3)
+    assert str(sub4) == ""
+    assert sub4.capacity == 20
 
 
 def test_indexing():
@@ -153,8 +179,30 @@ def test_equality():
     assert s1 != 123  # Should return False, not crash
 
 
+def test_hash():
+    """Test hashing and cache invalidation."""
+    s1 = SafeString(10, "hello")
+    s2 = SafeString(5, "hello")
+    
+    # Equal content hashes alike, including against Python strings
+    assert hash(s1) == hash(s2) == hash("hello")
+    assert len({s1, s2, "hello"}) == 1
+    
+    # Mutation invalidates the cached hash
+    s1.append("!")
+    assert hash(s1) == hash("hello!")
+    assert s1 != s2
+    
+    s1.clear()
+    assert hash(s1) == hash("")
+
+
 def test_concatenation():
     """Test string concatenation."""
+    # Only SafeString operands are supported
+    with pytest.raises(TypeError):
+        SafeString(10, "a") + "b"
+    
     s1 = SafeString(10, "hello")
     s2 = SafeString(10, " world")
     
@@ -250,6 +298,11 @@ def test_is_ascii():
     assert not s.is_ascii("café")
     assert not s.is_ascii("🎉")
     assert not s.is_ascii("∂y/∂x")  # Mathematical symbols
+    
+    # Only str input is accepted, as in every other SafeString method
+    assert not s.is_ascii(b"hello")
+    assert not s.is_ascii(bytearray(b"GET / HTTP/1.1"))
+    assert not s.is_ascii(123)
 
 
 if __name__ == "__main__":
@@ -263,6 +316,7 @@ if __name__ == "__main__":
         test_find_and_substr,
         test_indexing,
         test_equality,
+        test_hash,
         test_concatenation,
         test_prefix_suffix,
         test_replace,